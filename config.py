@@ -4,6 +4,8 @@
 """
 
 import os
+from functools import lru_cache
+
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 
@@ -17,12 +19,19 @@ DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
 DEEPSEEK_MODEL = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
 DECISION_USE_LLM = os.getenv("DECISION_USE_LLM", "true").lower() in ("1", "true", "yes")
 MULTI_OPTION_COUNT = int(os.getenv("MULTI_OPTION_COUNT", "2"))
+# 服务端同时推进的工作流步骤上限（每一步都包含若干次 LLM 调用）
+WORKFLOW_CONCURRENCY = int(os.getenv("WORKFLOW_CONCURRENCY", "16"))
+# 是否在 action_inputs 中记录每次生成的输入快照（调试/回放用，关闭可减小状态体积）
+RECORD_ACTION_INPUTS = os.getenv("RECORD_ACTION_INPUTS", "true").lower() in ("1", "true", "yes")
 
 
+@lru_cache(maxsize=8)
 def get_llm(temperature: float = 0.7) -> ChatOpenAI:
     """
     获取配置好的 LLM 实例
 
+    同一温度复用同一个客户端（及其 HTTP 连接池），实例在线程间共享，调用方不应修改其属性。
+
     Args:
         temperature: 生成温度，控制随机性
 
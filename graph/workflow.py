@@ -4,11 +4,16 @@ LangGraph 工作流定义
 """
 
 import os
+import threading
 from typing import TypedDict, Annotated
 from langgraph.graph import StateGraph, END
 
 import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 作为脚本直接运行时补充项目根目录，已在路径中则不重复添加
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from state.agent_state import AgentState, create_initial_state
 from nodes.start_point_node import start_point_node
@@ -79,6 +84,20 @@ def compile_workflow():
     return workflow.compile()
 
 
+_compiled_app = None
+_compile_lock = threading.Lock()
+
+
+def _get_app():
+    """获取已编译的工作流（进程内只编译一次，图结构在运行期间不变）"""
+    global _compiled_app
+    if _compiled_app is None:
+        with _compile_lock:
+            if _compiled_app is None:
+                _compiled_app = compile_workflow()
+    return _compiled_app
+
+
 def run_workflow(
     user_input: str,
     topic: str = None,
@@ -119,8 +138,10 @@ def run_workflow(
         interactive=interactive,
     )
 
-    app = compile_workflow()
-    final_state = app.invoke(initial_state)
+    # 逐节点消费状态，只保留最新的完整状态
+    final_state = initial_state
+    for final_state in _get_app().stream(initial_state, stream_mode="values"):
+        pass
 
     return final_state
 
@@ -129,8 +150,7 @@ def run_workflow_step(state: AgentState) -> AgentState:
     """
     运行一次工作流（适用于 HITL 分步）
     """
-    app = compile_workflow()
-    return app.invoke(state)
+    return _get_app().invoke(state)
 
 
 # 便捷函数：打印课程设计结果
@@ -142,44 +162,56 @@ def print_course_design(state: AgentState) -> None:
         state: 最终状态
     """
     course = state.get("course_design", {})
+    heavy = "=" * 60
+    light = "-" * 60
+    question_chain = "\n".join(
+        f"{i}. {q}" for i, q in enumerate(course.get("question_chain", []), 1)
+    )
 
-    print("\n" + "=" * 60)
-    print("📚 PBL 课程设计方案")
-    print("=" * 60)
-
-    print(f"\n🎯 主题：{state.get('topic', '')}")
-    print(f"👥 年级：{state.get('grade_level', '')}")
-    print(f"⏱️  时长：{state.get('duration', '')}分钟")
-
-    print("\n" + "-" * 60)
-    print("📖 教学场景")
-    print("-" * 60)
-    print(course.get("scenario", "未生成"))
-
-    print("\n" + "-" * 60)
-    print("❓ 驱动问题")
-    print("-" * 60)
-    print(course.get("driving_question", "未生成"))
-
-    print("\n" + "-" * 60)
-    print("🔗 问题链")
-    print("-" * 60)
-    for i, q in enumerate(course.get("question_chain", []), 1):
-        print(f"{i}. {q}")
-
-    print("\n" + "-" * 60)
-    print("🎮 活动设计")
-    print("-" * 60)
-    print(course.get("activity", "未生成"))
-
-    print("\n" + "-" * 60)
-    print("🔬 实验设计")
-    print("-" * 60)
-    print(course.get("experiment", "未生成"))
-
-    print("\n" + "=" * 60)
-    print("✅ 课程设计完成！")
-    print("=" * 60)
+    # 拼接为一个字符串后一次性输出
+    lines = [
+        "",
+        heavy,
+        "📚 PBL 课程设计方案",
+        heavy,
+        "",
+        f"🎯 主题：{state.get('topic', '')}",
+        f"👥 年级：{state.get('grade_level', '')}",
+        f"⏱️  时长：{state.get('duration', '')}分钟",
+        "",
+        light,
+        "📖 教学场景",
+        light,
+        course.get("scenario", "未生成"),
+        "",
+        light,
+        "❓ 驱动问题",
+        light,
+        course.get("driving_question", "未生成"),
+        "",
+        light,
+        "🔗 问题链",
+        light,
+    ]
+    if question_chain:
+        lines.append(question_chain)
+    lines.extend([
+        "",
+        light,
+        "🎮 活动设计",
+        light,
+        course.get("activity", "未生成"),
+        "",
+        light,
+        "🔬 实验设计",
+        light,
+        course.get("experiment", "未生成"),
+        "",
+        heavy,
+        "✅ 课程设计完成！",
+        heavy,
+    ])
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 if __name__ == "__main__":
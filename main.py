@@ -12,11 +12,18 @@ import os
 import sys
 import threading
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库
+    orjson = None
+
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from graph.workflow import run_workflow_step, print_course_design
 from state.agent_state import create_initial_state, is_design_complete
+from tools.prompt_utils import get_prompt
 
 
 def parse_args():
@@ -129,8 +136,12 @@ def save_result(state: dict, output_path: str) -> None:
         "course_design": state.get("course_design", {}),
     }
     os.makedirs(os.path.dirname(output_path) if os.path.dirname(output_path) else ".", exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    if orjson is not None:
+        with open(output_path, "wb") as f:
+            f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
     print(f"\n[OK] Result saved to: {output_path}")
 
 
@@ -205,6 +216,14 @@ def render_preview(state: dict) -> None:
     print("-" * 60)
 
 
+def prewarm_remaining_prompts(state: dict) -> None:
+    """Parse the prompt templates of components not yet locked (runs while waiting for input)."""
+    locked = state.get("locked_components", []) or []
+    for component in ("scenario", "driving_question", "activity", "experiment"):
+        if component not in locked:
+            get_prompt(f"{component}.txt")
+
+
 def main():
     args = parse_args()
 
@@ -257,34 +276,38 @@ def main():
         if args.no_hitl:
             state = run_workflow_step(state)
         else:
-            while True:
-                state = run_workflow_step(state)
-                if state.get("await_user") and state.get("pending_component"):
-                    render_preview(state)
-                    if prompt_yes_no("Accept this output?", default=True):
-                        state["user_decision"] = "accept"
-                        state["user_feedback"] = None
-                        state["feedback_target"] = None
-                    else:
-                        default_target = state.get("pending_component") or "scenario"
-                        target = prompt_text(
-                            f"Which component to edit? (scenario/driving_question/activity/experiment, default {default_target}): ",
-                            required=False,
-                        ).strip() or default_target
-                        feedback = prompt_text("Feedback: ", required=True)
-                        state["user_decision"] = "regenerate"
-                        state["feedback_target"] = target
-                        state["user_feedback"] = {target: feedback}
-                    continue
-
-                if is_design_complete(state):
-                    break
-
-                if not state.get("await_user"):
-                    # Safety: avoid infinite loop if no actions remain
-                    if not state.get("action_sequence"):
+            # Warm up the next steps in the background while the user reads the preview.
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                while True:
+                    state = run_workflow_step(state)
+                    if state.get("await_user") and state.get("pending_component"):
+                        prewarm = executor.submit(prewarm_remaining_prompts, state)
+                        render_preview(state)
+                        if prompt_yes_no("Accept this output?", default=True):
+                            state["user_decision"] = "accept"
+                            state["user_feedback"] = None
+                            state["feedback_target"] = None
+                        else:
+                            default_target = state.get("pending_component") or "scenario"
+                            target = prompt_text(
+                                f"Which component to edit? (scenario/driving_question/activity/experiment, default {default_target}): ",
+                                required=False,
+                            ).strip() or default_target
+                            feedback = prompt_text("Feedback: ", required=True)
+                            state["user_decision"] = "regenerate"
+                            state["feedback_target"] = target
+                            state["user_feedback"] = {target: feedback}
+                        prewarm.result()
+                        continue
+
+                    if is_design_complete(state):
                         break
 
+                    if not state.get("await_user"):
+                        # Safety: avoid infinite loop if no actions remain
+                        if not state.get("action_sequence"):
+                            break
+
         if not args.quiet:
             print_course_design(state)
 
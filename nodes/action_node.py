@@ -3,18 +3,25 @@
 负责调用生成工具，更新课程设计和进度
 """
 
-import os
-from typing import Dict, Any
-
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from typing import Dict, Any, List
 
 from state.agent_state import AgentState
 from tools import get_tool
-from config import MULTI_OPTION_COUNT
+from config import MULTI_OPTION_COUNT, RECORD_ACTION_INPUTS
 from tools.generate_driving_question import generate_driving_question_candidates
 from tools.generate_scenario import generate_scenario_candidates
 
+# 组件到生成工具的映射（工具函数在导入时解析一次）
+_COMPONENT_TO_TOOL = {
+    "scenario": "generate_scenario",
+    "driving_question": "generate_driving_question",
+    "activity": "generate_activity",
+    "experiment": "generate_experiment",
+}
+_COMPONENT_TOOL_FUNCS = {
+    component: get_tool(tool_name) for component, tool_name in _COMPONENT_TO_TOOL.items()
+}
+
 
 def generate_component(
     state: AgentState,
@@ -24,44 +31,44 @@ def generate_component(
     """
     生成指定组件并更新状态
     """
-    component_to_tool = {
-        "scenario": "generate_scenario",
-        "driving_question": "generate_driving_question",
-        "activity": "generate_activity",
-        "experiment": "generate_experiment",
-    }
-    tool_name = component_to_tool.get(component)
+    tool_name = _COMPONENT_TO_TOOL.get(component)
     if not tool_name:
         raise ValueError(f"Unknown component: {component}")
 
-    tool_func = get_tool(tool_name)
+    tool_func = _COMPONENT_TOOL_FUNCS[component]
 
+    # 一次性取出各工具共用的状态字段
     course_design = state.get("course_design", {})
     knowledge_snippets = state.get("knowledge_snippets", {})
+    topic = state["topic"]
+    grade_level = state["grade_level"]
+    duration = state["duration"]
+    context_summary = state.get("context_summary", "")
+    multi_option = state.get("multi_option", True)
+    option_count = max(1, MULTI_OPTION_COUNT)
+    pending_candidates: List[Dict[str, Any]] = []
+    selected_candidate_id = None
 
     if component == "scenario":
-        if state.get("multi_option", True):
-            candidates = generate_scenario_candidates(
-                topic=state["topic"],
-                grade_level=state["grade_level"],
-                duration=state["duration"],
-                context_summary=state.get("context_summary", ""),
+        if multi_option:
+            pending_candidates = generate_scenario_candidates(
+                topic=topic,
+                grade_level=grade_level,
+                duration=duration,
+                context_summary=context_summary,
                 knowledge_snippets=knowledge_snippets,
                 user_feedback=user_feedback,
-                count=max(1, MULTI_OPTION_COUNT),
+                count=option_count,
             )
-            selected = candidates[0] if candidates else {}
+            selected = pending_candidates[0] if pending_candidates else {}
             course_design["scenario"] = selected.get("scenario", "")
-            state["pending_candidates"] = candidates
-            state["selected_candidate_id"] = selected.get("id")
+            selected_candidate_id = selected.get("id")
         else:
-            state["pending_candidates"] = []
-            state["selected_candidate_id"] = None
             result = tool_func(
-                topic=state["topic"],
-                grade_level=state["grade_level"],
-                duration=state["duration"],
-                context_summary=state.get("context_summary", ""),
+                topic=topic,
+                grade_level=grade_level,
+                duration=duration,
+                context_summary=context_summary,
                 knowledge_snippets=knowledge_snippets,
                 user_feedback=user_feedback,
             )
@@ -69,41 +76,36 @@ def generate_component(
         progress_update = {"scenario": True}
 
     elif component == "driving_question":
-        if state.get("multi_option", True):
-            candidates = generate_driving_question_candidates(
+        if multi_option:
+            pending_candidates = generate_driving_question_candidates(
                 scenario=course_design.get("scenario", ""),
-                grade_level=state["grade_level"],
-                context_summary=state.get("context_summary", ""),
+                grade_level=grade_level,
+                context_summary=context_summary,
                 user_feedback=user_feedback,
-                count=max(1, MULTI_OPTION_COUNT),
+                count=option_count,
             )
-            selected = candidates[0] if candidates else {}
+            selected = pending_candidates[0] if pending_candidates else {}
             course_design["driving_question"] = selected.get("driving_question", "")
             course_design["question_chain"] = selected.get("question_chain", [])
-            state["pending_candidates"] = candidates
-            state["selected_candidate_id"] = selected.get("id")
+            selected_candidate_id = selected.get("id")
         else:
             result = tool_func(
                 scenario=course_design.get("scenario", ""),
-                grade_level=state["grade_level"],
-                context_summary=state.get("context_summary", ""),
+                grade_level=grade_level,
+                context_summary=context_summary,
                 user_feedback=user_feedback,
             )
             course_design["driving_question"] = result.get("driving_question", "")
             course_design["question_chain"] = result.get("question_chain", [])
-            state["pending_candidates"] = []
-            state["selected_candidate_id"] = None
         progress_update = {"driving_question": True, "question_chain": True}
 
     elif component == "activity":
-        state["pending_candidates"] = []
-        state["selected_candidate_id"] = None
         result = tool_func(
             driving_question=course_design.get("driving_question", ""),
             question_chain=course_design.get("question_chain", []),
-            grade_level=state["grade_level"],
-            duration=state["duration"],
-            context_summary=state.get("context_summary", ""),
+            grade_level=grade_level,
+            duration=duration,
+            context_summary=context_summary,
             knowledge_snippets=knowledge_snippets,
             user_feedback=user_feedback,
         )
@@ -111,15 +113,13 @@ def generate_component(
         progress_update = {"activity": True}
 
     elif component == "experiment":
-        state["pending_candidates"] = []
-        state["selected_candidate_id"] = None
         activity_summary = course_design.get("activity", "")[:500]
         result = tool_func(
-            topic=state["topic"],
-            grade_level=state["grade_level"],
+            topic=topic,
+            grade_level=grade_level,
             driving_question=course_design.get("driving_question", ""),
             activity_summary=activity_summary,
-            context_summary=state.get("context_summary", ""),
+            context_summary=context_summary,
             knowledge_snippets=knowledge_snippets,
             classroom_mode=state.get("classroom_mode", "normal"),
             classroom_context=state.get("classroom_context", ""),
@@ -145,25 +145,26 @@ def generate_component(
     observations.append(f"[{tool_name}] 完成")
 
     action_inputs = state.get("action_inputs", [])
-    action_inputs.append({
-        "action": tool_name,
-        "component": component,
-        "inputs": {
-            "topic": state.get("topic"),
-            "grade_level": state.get("grade_level"),
-            "duration": state.get("duration"),
-            "context_summary": state.get("context_summary", ""),
-            "knowledge_snippets": knowledge_snippets,
-            "course_design_snapshot": {
-                "scenario": course_design.get("scenario", ""),
-                "driving_question": course_design.get("driving_question", ""),
-                "question_chain": course_design.get("question_chain", []),
-                "activity": course_design.get("activity", ""),
-                "experiment": course_design.get("experiment", ""),
+    if RECORD_ACTION_INPUTS:
+        action_inputs.append({
+            "action": tool_name,
+            "component": component,
+            "inputs": {
+                "topic": topic,
+                "grade_level": grade_level,
+                "duration": duration,
+                "context_summary": context_summary,
+                "knowledge_snippets": knowledge_snippets,
+                "course_design_snapshot": {
+                    "scenario": course_design.get("scenario", ""),
+                    "driving_question": course_design.get("driving_question", ""),
+                    "question_chain": course_design.get("question_chain", []),
+                    "activity": course_design.get("activity", ""),
+                    "experiment": course_design.get("experiment", ""),
+                },
+                "user_feedback": user_feedback,
             },
-            "user_feedback": user_feedback,
-        },
-    })
+        })
 
     return {
         "course_design": course_design,
@@ -171,8 +172,8 @@ def generate_component(
         "component_validity": component_validity,
         "observations": observations,
         "action_inputs": action_inputs,
-        "pending_candidates": state.get("pending_candidates", []),
-        "selected_candidate_id": state.get("selected_candidate_id"),
+        "pending_candidates": pending_candidates,
+        "selected_candidate_id": selected_candidate_id,
     }
 
 
@@ -3,6 +3,8 @@ HITL Action Loop 节点
 负责生成组件、等待用户确认，以及处理重生成与级联规则
 """
 
+import re
+from collections import ChainMap
 from typing import Dict, Any, List
 
 from state.agent_state import AgentState, is_design_complete
@@ -19,9 +21,12 @@ def _get_feedback(state: AgentState, component: str) -> str:
     return ""
 
 
+# 表示“只改当前组件、保留下游”的反馈关键词
+_KEEP_DOWNSTREAM_RE = re.compile("只改当前|不动后面|保留后面|仅修改当前|只微调")
+
+
 def _should_keep_downstream(feedback: str) -> bool:
-    keywords = ["只改当前", "不动后面", "保留后面", "仅修改当前", "只微调"]
-    return any(k in feedback for k in keywords)
+    return _KEEP_DOWNSTREAM_RE.search(feedback) is not None
 
 
 def _apply_cascade_reset(
@@ -50,8 +55,10 @@ def _apply_cascade_reset(
             course_design[comp] = ""
             design_progress[comp] = False
             component_validity[comp] = "INVALID"
-        if comp in locked_components:
-            locked_components.remove(comp)
+
+    # 被重置的组件统一解锁，一次性重建列表（保持原有顺序）
+    reset = set(targets)
+    locked_components[:] = [comp for comp in locked_components if comp not in reset]
 
 
 def _build_preview(component: str, course_design: Dict[str, Any]) -> Dict[str, Any]:
@@ -93,7 +100,26 @@ def _apply_candidate_selection(
 
 def hitl_loop_node(state: AgentState) -> Dict[str, Any]:
     hitl_enabled = state.get("hitl_enabled", True)
+    await_user = state.get("await_user", False)
+    user_decision = state.get("user_decision")
 
+    # 如果在等待用户且未给出决策，直接返回等待状态（不做任何修改，无需复制）
+    if hitl_enabled and await_user and not user_decision:
+        return {
+            "course_design": state.get("course_design", {}),
+            "design_progress": state.get("design_progress", {}),
+            "component_validity": state.get("component_validity", {}),
+            "locked_components": state.get("locked_components", []),
+            "observations": state.get("observations", []),
+            "action_inputs": state.get("action_inputs", []),
+            "await_user": True,
+            "pending_component": state.get("pending_component"),
+            "pending_preview": state.get("pending_preview", {}),
+            "pending_candidates": state.get("pending_candidates", []),
+            "selected_candidate_id": state.get("selected_candidate_id"),
+        }
+
+    # 以下分支会修改这些容器，先复制一份
     course_design = dict(state.get("course_design", {}))
     design_progress = dict(state.get("design_progress", {}))
     component_validity = dict(state.get("component_validity", {}))
@@ -105,26 +131,8 @@ def hitl_loop_node(state: AgentState) -> Dict[str, Any]:
     pending_preview = dict(state.get("pending_preview", {}))
     pending_candidates = list(state.get("pending_candidates", []))
     selected_candidate_id = state.get("selected_candidate_id")
-    await_user = state.get("await_user", False)
-    user_decision = state.get("user_decision")
     feedback_target = state.get("feedback_target")
 
-    # 如果在等待用户且未给出决策，直接返回等待状态
-    if hitl_enabled and await_user and not user_decision:
-        return {
-            "course_design": course_design,
-            "design_progress": design_progress,
-            "component_validity": component_validity,
-            "locked_components": locked_components,
-            "observations": observations,
-            "action_inputs": action_inputs,
-            "await_user": True,
-            "pending_component": pending_component,
-            "pending_preview": pending_preview,
-            "pending_candidates": pending_candidates,
-            "selected_candidate_id": selected_candidate_id,
-        }
-
     # 如果有用户决策，先应用
     if await_user and user_decision:
         current = pending_component or state.get("current_component") or ""
@@ -189,13 +197,20 @@ def hitl_loop_node(state: AgentState) -> Dict[str, Any]:
         feedback_target = None
 
     # 更新动作序列
-    tmp_state = dict(state)
-    tmp_state["course_design"] = course_design
-    tmp_state["design_progress"] = design_progress
-    tmp_state["component_validity"] = component_validity
-    action_sequence = plan_action_sequence(tmp_state)
+    # 在原状态之上叠加本节点修改过的容器，避免整份复制 state
+    working_state = ChainMap(
+        {
+            "course_design": course_design,
+            "design_progress": design_progress,
+            "component_validity": component_validity,
+            "observations": observations,
+            "action_inputs": action_inputs,
+        },
+        state,
+    )
+    action_sequence = plan_action_sequence(working_state)
 
-    if not action_sequence or is_design_complete(tmp_state):
+    if not action_sequence or is_design_complete(working_state):
         return {
             "course_design": course_design,
             "design_progress": design_progress,
@@ -218,18 +233,7 @@ def hitl_loop_node(state: AgentState) -> Dict[str, Any]:
     if hitl_enabled:
         component = action_sequence[0]
         feedback = _get_feedback(state, component)
-        gen_updates = generate_component(
-            {
-                **state,
-                "course_design": course_design,
-                "design_progress": design_progress,
-                "component_validity": component_validity,
-                "observations": observations,
-                "action_inputs": action_inputs,
-            },
-            component,
-            feedback,
-        )
+        gen_updates = generate_component(working_state, component, feedback)
         course_design = gen_updates["course_design"]
         design_progress = gen_updates["design_progress"]
         component_validity = gen_updates["component_validity"]
@@ -260,22 +264,11 @@ def hitl_loop_node(state: AgentState) -> Dict[str, Any]:
             "feedback_target": None,
         }
 
-    # HITL 关闭：自动生成并接受所有剩余组件
-    while action_sequence:
-        component = action_sequence[0]
+    # HITL 关闭：按规划顺序自动生成并接受所有剩余组件
+    # 生成只会把当前组件标记为完成，重新规划的结果恰好是剩余序列，因此只需遍历一次
+    for component in action_sequence:
         feedback = _get_feedback(state, component)
-        gen_updates = generate_component(
-            {
-                **state,
-                "course_design": course_design,
-                "design_progress": design_progress,
-                "component_validity": component_validity,
-                "observations": observations,
-                "action_inputs": action_inputs,
-            },
-            component,
-            feedback,
-        )
+        gen_updates = generate_component(working_state, component, feedback)
         course_design = gen_updates["course_design"]
         design_progress = gen_updates["design_progress"]
         component_validity = gen_updates["component_validity"]
@@ -286,11 +279,6 @@ def hitl_loop_node(state: AgentState) -> Dict[str, Any]:
             locked_components.append(component)
         component_validity[component] = "VALID"
 
-        tmp_state["course_design"] = course_design
-        tmp_state["design_progress"] = design_progress
-        tmp_state["component_validity"] = component_validity
-        action_sequence = plan_action_sequence(tmp_state)
-
     return {
         "course_design": course_design,
         "design_progress": design_progress,
@@ -298,7 +286,7 @@ def hitl_loop_node(state: AgentState) -> Dict[str, Any]:
         "locked_components": locked_components,
         "observations": observations,
         "action_inputs": action_inputs,
-        "action_sequence": action_sequence,
+        "action_sequence": [],
         "current_component": "",
         "await_user": False,
         "pending_component": None,
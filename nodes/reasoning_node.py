@@ -6,21 +6,84 @@
 import json
 import os
 import re
+from functools import lru_cache
 from typing import Dict, Any, List, Tuple
 
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from state.agent_state import AgentState, KnowledgeSnippets
 from config import KNOWLEDGE_BASE_PATH, get_llm
+from tools.llm_cache import cached_invoke
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库
+    _json_loads = json.loads
+
+
+# 年级识别：一次扫描找出所有年级词，再按“具体年级优先、小学>初中>高中”的顺序取结果
+_GRADE_ORDER = ("小学", "初中", "高中")
+_GRADE_RE = re.compile(r"(小学|初中|高中)(?:([一二三四五六])年)?")
+_GRADE_NUMBERS = {"小学": "一二三四五六", "初中": "一二三", "高中": "一二三"}
+_DURATION_RE = re.compile(r"(\d+)\s*分钟")
+# 40+40 中间可能带空白，其余“两节课”写法用子串判断即可
+_DOUBLE_PERIOD_RE = re.compile(r"40\s*\+\s*40")
+# 提取主题时依次去除的年级、时长和无关词
+# 需逐个执行：去掉一段后两侧文字可能拼成新的可去除词（如“设小学计”→“设计”）
+_TOPIC_STRIP_PATTERNS = (
+    re.compile(r"小学[一二三四五六]年级?"),
+    re.compile(r"初中[一二三]年级?"),
+    re.compile(r"高中[一二三]年级?"),
+    re.compile(r"小学"),
+    re.compile(r"初中"),
+    re.compile(r"高中"),
+    _DURATION_RE,
+    re.compile(r"设计|课程|PBL|为|的"),
+)
+
+
+@lru_cache(maxsize=1)
+def _read_knowledge_base(mtime: float) -> Dict[str, Any]:
+    with open(KNOWLEDGE_BASE_PATH, "rb") as f:
+        knowledge_base = _json_loads(f.read())
+    # 年级规则和主题模板文本只依赖知识库内容，加载时一次性格式化
+    knowledge_base["_grade_rules_text"] = {
+        grade: _format_grade_rules(info)
+        for grade, info in knowledge_base.get("grade_rules", {}).items()
+    }
+    knowledge_base["_topic_template_text"] = {
+        name: _format_topic_template(name, info)
+        for name, info in knowledge_base.get("topic_templates", {}).items()
+    }
+    return knowledge_base
+
 
 def load_knowledge_base() -> Dict[str, Any]:
-    """加载预置知识库"""
-    with open(KNOWLEDGE_BASE_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """
+    加载预置知识库
+
+    按文件修改时间缓存解析结果：文件未变化时直接复用，运行中编辑知识库后自动重新加载。
+    解析结果附带预先格式化的年级规则与主题模板文本（以下划线开头的键）。
+    返回的字典为共享对象，调用方不应修改。
+    """
+    return _read_knowledge_base(os.path.getmtime(KNOWLEDGE_BASE_PATH))
+
+
+def _detect_grade(user_input: str) -> str:
+    specific = set()
+    mentioned = set()
+    for match in _GRADE_RE.finditer(user_input):
+        grade, number = match.groups()
+        mentioned.add(grade)
+        if number and number in _GRADE_NUMBERS[grade]:
+            specific.add(grade)
+    for found in (specific, mentioned):
+        for grade in _GRADE_ORDER:
+            if grade in found:
+                return grade
+    return ""
 
 
 def parse_user_input(user_input: str, state: AgentState) -> Dict[str, str]:
@@ -48,34 +111,25 @@ def parse_user_input(user_input: str, state: AgentState) -> Dict[str, str]:
     duration = 80  # 默认值（两节课 40+40）
 
     # 提取年级
-    grade_patterns = [
-        (r"小学[一二三四五六]年级?", "小学"),
-        (r"初中[一二三]年级?", "初中"),
-        (r"高中[一二三]年级?", "高中"),
-        (r"小学", "小学"),
-        (r"初中", "初中"),
-        (r"高中", "高中"),
-    ]
-    for pattern, grade in grade_patterns:
-        if re.search(pattern, user_input):
-            grade_level = grade
-            break
+    grade_level = _detect_grade(user_input) or grade_level
 
     # 提取时长
-    duration_match = re.search(r"(\d+)\s*分钟", user_input)
+    duration_match = _DURATION_RE.search(user_input)
     if duration_match:
         duration = int(duration_match.group(1))
     # 两节课 40+40 或 2节课
-    if re.search(r"40\s*\+\s*40", user_input) or re.search(r"两节课|2节课|两节|2节", user_input):
+    if (
+        "两节" in user_input
+        or "2节" in user_input
+        or ("+" in user_input and _DOUBLE_PERIOD_RE.search(user_input))
+    ):
         duration = 80
 
     # 提取主题（更复杂的逻辑可以用 LLM）
     # 简单处理：移除年级和时长后的内容
     topic = user_input
-    for pattern, _ in grade_patterns:
-        topic = re.sub(pattern, "", topic)
-    topic = re.sub(r"\d+\s*分钟", "", topic)
-    topic = re.sub(r"设计|课程|PBL|为|的", "", topic)
+    for pattern in _TOPIC_STRIP_PATTERNS:
+        topic = pattern.sub("", topic)
     topic = topic.strip("，。！？、 ")
 
     return {
@@ -85,6 +139,33 @@ def parse_user_input(user_input: str, state: AgentState) -> Dict[str, str]:
     }
 
 
+def _format_grade_rules(grade_info: Any) -> str:
+    if not isinstance(grade_info, dict):
+        return str(grade_info)
+    return f"""
+年级：{grade_info.get('description', '')}
+教学风格：{grade_info.get('teaching_style', '')}
+时间约束：{grade_info.get('time_constraint', '')}
+材料约束：{grade_info.get('material_constraint', '')}
+认知水平：{grade_info.get('cognitive_level', '')}
+"""
+
+
+def _format_topic_template(template_name: str, info: Dict[str, Any]) -> str:
+    return f"""
+主题类型：{template_name}
+生活场景：{', '.join(info.get('life_scenarios', []))}
+类比建议：{info.get('analogy', '')}
+活动建议：{', '.join(info.get('activities', []))}
+"""
+
+
+@lru_cache(maxsize=64)
+def _keyword_pattern(keywords: Tuple[str, ...]) -> "re.Pattern[str]":
+    """将一个模板的关键词编译为单个正则（任一关键词出现即命中）"""
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords))
+
+
 def match_knowledge_snippets(
     topic: str,
     grade_level: str,
@@ -101,42 +182,31 @@ def match_knowledge_snippets(
     Returns:
         匹配的知识片段
     """
-    # 匹配年级规则
-    grade_rules = knowledge_base.get("grade_rules", {})
-    grade_info = grade_rules.get(grade_level, {})
-    if isinstance(grade_info, dict):
-        grade_rules_str = f"""
-年级：{grade_info.get('description', '')}
-教学风格：{grade_info.get('teaching_style', '')}
-时间约束：{grade_info.get('time_constraint', '')}
-材料约束：{grade_info.get('material_constraint', '')}
-认知水平：{grade_info.get('cognitive_level', '')}
-"""
+    # 匹配年级规则（优先使用加载时格式化好的文本）
+    grade_rules_text = knowledge_base.get("_grade_rules_text", {})
+    if grade_level in grade_rules_text:
+        grade_rules_str = grade_rules_text[grade_level]
     else:
-        grade_rules_str = str(grade_info)
+        grade_rules_str = _format_grade_rules(
+            knowledge_base.get("grade_rules", {}).get(grade_level, {})
+        )
 
     # 匹配主题模板
     topic_templates = knowledge_base.get("topic_templates", {})
     topic_template = ""
     best_match = None
 
+    # 按模板顺序取第一个命中关键词的模板，每个模板只扫描一遍主题
     for template_name, template_info in topic_templates.items():
         keywords = template_info.get("keywords", [])
-        for keyword in keywords:
-            if keyword in topic:
-                best_match = template_name
-                break
-        if best_match:
+        if keywords and _keyword_pattern(tuple(keywords)).search(topic):
+            best_match = template_name
             break
 
     if best_match and best_match in topic_templates:
-        info = topic_templates[best_match]
-        topic_template = f"""
-主题类型：{best_match}
-生活场景：{', '.join(info.get('life_scenarios', []))}
-类比建议：{info.get('analogy', '')}
-活动建议：{', '.join(info.get('activities', []))}
-"""
+        topic_template = knowledge_base.get("_topic_template_text", {}).get(best_match)
+        if topic_template is None:
+            topic_template = _format_topic_template(best_match, topic_templates[best_match])
 
     # 获取安全约束
     safety_constraints = knowledge_base.get("safety_constraints", [])
@@ -148,6 +218,29 @@ def match_knowledge_snippets(
     )
 
 
+# 上下文摘要模板只解析一次，各次调用共用
+_CONTEXT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """你是一位PBL课程设计专家。请根据以下信息生成一个简洁的上下文摘要。
+摘要应该包含：
+1. 目标学生的认知特点
+2. 课程时长的约束
+3. 教学重点和注意事项
+4. 适合的类比或引入方式
+
+如果提供了“已有组件锚点”，请在摘要中体现与之对齐的教学取向或情境线索。
+请用2-3句话概括，每句话不超过30字。"""),
+    ("user", """
+课程主题：{topic}
+目标年级：{grade_level}
+课程时长：{duration}分钟
+年级规则：{grade_rules}
+主题模板：{topic_template}
+已有组件类型：{anchor_type}
+已有组件内容：{anchor_content}
+""")
+])
+
+
 def generate_context_summary(
     topic: str,
     grade_level: str,
@@ -170,32 +263,12 @@ def generate_context_summary(
     Returns:
         上下文摘要
     """
+    use_cache = llm is None
     if llm is None:
         llm = get_llm(temperature=0.3)
 
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """你是一位PBL课程设计专家。请根据以下信息生成一个简洁的上下文摘要。
-摘要应该包含：
-1. 目标学生的认知特点
-2. 课程时长的约束
-3. 教学重点和注意事项
-4. 适合的类比或引入方式
-
-如果提供了“已有组件锚点”，请在摘要中体现与之对齐的教学取向或情境线索。
-请用2-3句话概括，每句话不超过30字。"""),
-        ("user", """
-课程主题：{topic}
-目标年级：{grade_level}
-课程时长：{duration}分钟
-年级规则：{grade_rules}
-主题模板：{topic_template}
-已有组件类型：{anchor_type}
-已有组件内容：{anchor_content}
-""")
-    ])
-
-    chain = prompt | llm
-    result = chain.invoke({
+    chain = _CONTEXT_PROMPT | llm
+    payload = {
         "topic": topic,
         "grade_level": grade_level,
         "duration": duration,
@@ -203,9 +276,15 @@ def generate_context_summary(
         "topic_template": knowledge_snippets["topic_template"],
         "anchor_type": anchor_type or "无",
         "anchor_content": (anchor_content[:800] if anchor_content else "无"),
-    })
+    }
 
-    return result.content.strip()
+    def _invoke(variables: Dict[str, Any]) -> str:
+        return chain.invoke(variables).content.strip()
+
+    # 默认模型下相同输入的摘要直接复用（HITL 每一步都会重新进入推理节点）
+    if use_cache:
+        return cached_invoke("context_summary", payload, _invoke)
+    return _invoke(payload)
 
 
 def get_component_order() -> List[str]:
@@ -282,6 +361,15 @@ def merge_provided_components(state: AgentState) -> Tuple[Dict[str, Any], Dict[s
     return course_design, progress
 
 
+# 锚点组件的选取顺序及其中文名称
+_ANCHOR_SOURCES = (
+    ("scenario", "场景"),
+    ("activity", "活动"),
+    ("experiment", "实验"),
+    ("driving_question", "驱动问题"),
+)
+
+
 def reasoning_node(state: AgentState) -> Dict[str, Any]:
     """
     推理节点主函数
@@ -317,18 +405,11 @@ def reasoning_node(state: AgentState) -> Dict[str, Any]:
     # 收集已有组件作为锚点（支持任意起点）
     anchor_type = ""
     anchor_content = ""
-    if course_design.get("scenario"):
-        anchor_type = "场景"
-        anchor_content = course_design.get("scenario", "")
-    elif course_design.get("activity"):
-        anchor_type = "活动"
-        anchor_content = course_design.get("activity", "")
-    elif course_design.get("experiment"):
-        anchor_type = "实验"
-        anchor_content = course_design.get("experiment", "")
-    elif course_design.get("driving_question"):
-        anchor_type = "驱动问题"
-        anchor_content = course_design.get("driving_question", "")
+    for key, label in _ANCHOR_SOURCES:
+        content = course_design.get(key)
+        if content:
+            anchor_type, anchor_content = label, content
+            break
 
     # 生成上下文摘要
     context_summary = generate_context_summary(
@@ -366,7 +447,6 @@ def reasoning_node(state: AgentState) -> Dict[str, Any]:
         "knowledge_snippets": knowledge_snippets,
         "thought": thought,
         "action_sequence": action_sequence,
-        "action_inputs": state.get("action_inputs", []),
         "current_action_index": 0,
         "course_design": course_design,
         "design_progress": design_progress,
@@ -8,9 +8,11 @@ from typing import Dict, Any
 from state.agent_state import AgentState
 
 
-def _has_content(state: AgentState, component: str) -> bool:
-    provided = state.get("provided_components", {}) or {}
-    course_design = state.get("course_design", {}) or {}
+def _has_content(
+    provided: Dict[str, Any],
+    course_design: Dict[str, Any],
+    component: str,
+) -> bool:
     if provided.get(component):
         return True
     if course_design.get(component):
@@ -30,8 +32,9 @@ def start_point_node(state: AgentState) -> Dict[str, Any]:
             provided[key] = course_design.get(key)
 
     # 起点校验：activity/experiment 必须有内容，否则回退
-    if start_from in ("activity", "experiment") and not _has_content(state, start_from):
-        observations.append(f"[start_point] {start_from} 缺少内容，已回退为 topic")
+    # 只有回退时才生成新的 observations 列表，不修改传入状态中的列表
+    if start_from in ("activity", "experiment") and not _has_content(provided, course_design, start_from):
+        observations = observations + [f"[start_point] {start_from} 缺少内容，已回退为 topic"]
         start_from = "topic"
 
     return {
@@ -3,11 +3,19 @@ import time
 from typing import Any, Dict, List, Optional
 from uuid import uuid4
 
+import anyio
+import anyio.to_thread
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库
+    orjson = None
+
 import config
 from graph.workflow import run_workflow_step
 from state.agent_state import create_initial_state
@@ -23,6 +31,7 @@ from server.session_store import (
     get_session,
     increment_generation,
     reset_generation,
+    set_virtual_files,
     update_config,
     update_state,
     update_task,
@@ -48,6 +57,10 @@ WEB_DIST = os.path.join(PROJECT_ROOT, "web", "dist")
 
 app = FastAPI()
 
+# 工作流步骤专用的线程上限：每个步骤占用一个线程直到 LLM 调用结束，
+# 同时执行的步骤数与线程数相同；超出的请求在此排队，不影响会话查询等轻量接口
+WORKFLOW_LIMITER = anyio.CapacityLimiter(config.WORKFLOW_CONCURRENCY)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
@@ -64,12 +77,22 @@ def _require_session(session_id: str) -> Dict[str, Any]:
     return session
 
 
-def _build_response(session_id: str, state: Dict[str, Any], error: Optional[str] = None) -> SessionResponse:
+def _build_response(
+    session_id: str,
+    state: Dict[str, Any],
+    error: Optional[str] = None,
+    reuse_files: bool = False,
+) -> SessionResponse:
     session = get_session(session_id) or {}
+    # 只读接口复用上次生成的虚拟文件；写接口总是重新生成并刷新缓存
+    virtual_files = session.get("virtual_files") if reuse_files else None
+    if virtual_files is None:
+        virtual_files = build_virtual_files(state)
+        set_virtual_files(session_id, state, virtual_files)
     return SessionResponse(
         session_id=session_id,
         state=state,
-        virtual_files=build_virtual_files(state),
+        virtual_files=virtual_files,
         task=session.get("task"),
         messages=session.get("messages", []),
         error=error,
@@ -112,26 +135,38 @@ def _sync_task_and_messages(session_id: str, state: Dict[str, Any], user_action:
     task = refresh_task(task, state)
     update_task(session_id, task)
 
-    messages: List[Dict[str, Any]] = list(session.get("messages", []))
+    # 相邻去重只需要最后一条消息，全文去重查已出现过的消息文本集合
+    tail: List[Dict[str, Any]] = session.get("messages", [])[-1:]
     status_message = build_status_message(task, state)
     additions: List[Dict[str, Any]] = []
     if status_message:
         additions.append(status_message)
     knowledge_message = build_knowledge_message(state)
-    if knowledge_message and not any(
-        msg.get("message") == knowledge_message.get("message") for msg in messages
-    ):
+    if knowledge_message and knowledge_message.get("message") not in session.get("message_texts", ()):
         additions.append(knowledge_message)
     decision = decide_next(task, state, user_action)
     additions.extend(build_decision_messages(decision))
-    messages = append_message_list(messages, additions)
-    append_messages(session_id, messages[len(session.get("messages", [])):])
+    messages = append_message_list(list(tail), additions)
+    append_messages(session_id, messages[len(tail):])
+
+
+async def _run_step(state: Dict[str, Any]) -> Dict[str, Any]:
+    return await anyio.to_thread.run_sync(run_workflow_step, state, limiter=WORKFLOW_LIMITER)
 
 
+def _record_step(session_id: str, state: Dict[str, Any], user_action: str) -> None:
+    update_state(session_id, state)
+    generation_index = increment_generation(session_id)
+    write_generation_snapshot(session_id, state, generation_index)
+    _sync_task_and_messages(session_id, state, user_action)
+
+
+# 生成类接口为异步：工作流步骤在 WORKFLOW_LIMITER 限定的线程中执行，等待 LLM 时不阻塞事件循环；
+# 其余可能阻塞的步骤（起点判定、决策层 LLM、快照写盘）放入默认线程池执行
 @app.post("/api/sessions", response_model=SessionResponse)
-def create_session_api(request: SessionCreateRequest) -> SessionResponse:
+async def create_session_api(request: SessionCreateRequest) -> SessionResponse:
     config_payload = request.model_dump()
-    state = _create_state_from_request(request)
+    state = await run_in_threadpool(_create_state_from_request, request)
     config_payload["start_from"] = state.get("start_from", config_payload.get("start_from"))
     session_id = create_session(config_payload, state)
     update_task(session_id, create_task(session_id, state))
@@ -142,11 +177,8 @@ def create_session_api(request: SessionCreateRequest) -> SessionResponse:
         error = _ensure_api_key()
         if not error:
             try:
-                state = run_workflow_step(state)
-                update_state(session_id, state)
-                generation_index = increment_generation(session_id)
-                write_generation_snapshot(session_id, state, generation_index)
-                _sync_task_and_messages(session_id, state, "start")
+                state = await _run_step(state)
+                await run_in_threadpool(_record_step, session_id, state, "start")
             except Exception as exc:  # pragma: no cover - surface to UI
                 error = str(exc)
 
@@ -159,11 +191,11 @@ def get_session_api(session_id: str) -> SessionResponse:
     state = session["state"]
     if not session.get("task"):
         update_task(session_id, create_task(session_id, state))
-    return _build_response(session_id, state)
+    return _build_response(session_id, state, reuse_files=True)
 
 
 @app.post("/api/sessions/{session_id}/actions", response_model=SessionResponse)
-def session_action_api(session_id: str, request: ActionRequest) -> SessionResponse:
+async def session_action_api(session_id: str, request: ActionRequest) -> SessionResponse:
     session = _require_session(session_id)
     state = session["state"]
     error = None
@@ -203,7 +235,7 @@ def session_action_api(session_id: str, request: ActionRequest) -> SessionRespon
     elif request.action == "reset":
         config_payload = session.get("config", {})
         new_request = SessionCreateRequest(**config_payload)
-        state = _create_state_from_request(new_request)
+        state = await run_in_threadpool(_create_state_from_request, new_request)
         update_state(session_id, state)
         update_config(session_id, config_payload)
         reset_generation(session_id)
@@ -215,11 +247,8 @@ def session_action_api(session_id: str, request: ActionRequest) -> SessionRespon
     error = _ensure_api_key()
     if not error:
         try:
-            state = run_workflow_step(state)
-            update_state(session_id, state)
-            generation_index = increment_generation(session_id)
-            write_generation_snapshot(session_id, state, generation_index)
-            _sync_task_and_messages(session_id, state, request.action)
+            state = await _run_step(state)
+            await run_in_threadpool(_record_step, session_id, state, request.action)
         except Exception as exc:  # pragma: no cover - surface to UI
             error = str(exc)
 
@@ -252,20 +281,23 @@ def trigger_tool_api(session_id: str, request: ToolRequest) -> SessionResponse:
     session = _require_session(session_id)
     state = session["state"]
     tool_name = request.tool
+    # 同一次触发的两条消息共用阶段与时间戳
+    stage = state.get("current_component") or state.get("pending_component") or ""
+    now = time.time()
     additions = [
         {
             "id": uuid4().hex,
             "type": "tool_status",
             "message": f"正在调用工具：{tool_name}...",
-            "stage": state.get("current_component") or state.get("pending_component") or "",
-            "created_at": time.time(),
+            "stage": stage,
+            "created_at": now,
         },
         {
             "id": uuid4().hex,
             "type": "tool_status",
             "message": f"工具 {tool_name} 已完成（模拟）。",
-            "stage": state.get("current_component") or state.get("pending_component") or "",
-            "created_at": time.time(),
+            "stage": stage,
+            "created_at": now,
         },
     ]
     append_messages(session_id, additions)
@@ -274,7 +306,7 @@ def trigger_tool_api(session_id: str, request: ToolRequest) -> SessionResponse:
 
 
 @app.get("/api/sessions/{session_id}/export")
-def export_session_api(session_id: str) -> JSONResponse:
+def export_session_api(session_id: str) -> Response:
     session = _require_session(session_id)
     state = session["state"]
     payload = {
@@ -285,6 +317,9 @@ def export_session_api(session_id: str) -> JSONResponse:
         },
         "course_design": state.get("course_design", {}),
     }
+    # 带 response_model 的接口已由 Pydantic 直接序列化为字节，这里只需处理手工构造的导出内容
+    if orjson is not None:
+        return Response(content=orjson.dumps(payload), media_type="application/json")
     return JSONResponse(content=payload)
 
 
@@ -9,15 +9,50 @@ from langchain_core.prompts import ChatPromptTemplate
 from config import DECISION_USE_LLM, get_llm
 from server.task_manager import stage_label
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库
+    _json_loads = json.loads
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+# 决策层 Prompt（固定不变，模块加载时构建一次）
+_DECISION_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "你是课程设计助手的决策层，只做阶段决策与解释，不生成内容。"
+            "请基于输入返回 JSON："
+            "{{\"next_stage\":\"\", \"explanation\":\"\", \"user_message\":\"\"}}。",
+        ),
+        (
+            "user",
+            "Task: {task}\n"
+            "Current stage: {current_stage}\n"
+            "Stage status: {stage_status}\n"
+            "Completed stages: {completed_stages}\n"
+            "Component validity: {component_validity}\n"
+            "User action: {user_action}\n"
+            "Await user: {await_user}\n",
+        ),
+    ]
+)
+
 
 def _parse_json(text: str) -> Dict[str, Any]:
     if not text:
         return {}
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-    if not match:
-        return {}
+    cleaned = text.strip()
+    # 常见情况：回复本身就是一个 JSON 对象，无需正则提取
+    if not (cleaned.startswith("{") and cleaned.endswith("}")):
+        match = _JSON_OBJECT.search(cleaned)
+        if not match:
+            return {}
+        cleaned = match.group(0)
     try:
-        payload = json.loads(match.group(0))
+        payload = _json_loads(cleaned)
         if isinstance(payload, dict):
             return payload
     except json.JSONDecodeError:
@@ -81,27 +116,7 @@ def decide_next(task: Dict[str, Any], state: Dict[str, Any], user_action: str) -
         llm = get_llm(temperature=0.2)
         stage_status = _derive_stage_status(task, state)
         component_validity = state.get("component_validity", {})
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "你是课程设计助手的决策层，只做阶段决策与解释，不生成内容。"
-                    "请基于输入返回 JSON："
-                    "{\"next_stage\":\"\", \"explanation\":\"\", \"user_message\":\"\"}。",
-                ),
-                (
-                    "user",
-                    "Task: {task}\n"
-                    "Current stage: {current_stage}\n"
-                    "Stage status: {stage_status}\n"
-                    "Completed stages: {completed_stages}\n"
-                    "Component validity: {component_validity}\n"
-                    "User action: {user_action}\n"
-                    "Await user: {await_user}\n",
-                ),
-            ]
-        )
-        response = (prompt | llm).invoke(
+        response = (_DECISION_PROMPT | llm).invoke(
             {
                 "task": json.dumps(task, ensure_ascii=False),
                 "current_stage": task.get("current_stage", ""),
@@ -1,69 +1,63 @@
+import logging
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict
+
+from server.virtual_files import course_design_markdown, question_chain_text
 
 
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(APP_DIR)
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "output")
 
+logger = logging.getLogger(__name__)
 
-def _question_chain_text(course_design: Dict[str, Any]) -> str:
-    chain = course_design.get("question_chain", []) or []
-    return "\n".join(f"- {item}" for item in chain)
+# 快照写盘放到后台线程，不占用请求处理时间
+_SNAPSHOT_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="snapshot")
 
 
-def _course_design_markdown(course_design: Dict[str, Any]) -> str:
-    lines: List[str] = [
-        "# Course Design",
-        "",
-        "## Scenario",
-        course_design.get("scenario", "") or "_(empty)_",
-        "",
-        "## Driving Question",
-        course_design.get("driving_question", "") or "_(empty)_",
-        "",
-        "## Question Chain",
-    ]
-    chain = course_design.get("question_chain", []) or []
-    if chain:
-        lines.extend([f"- {item}" for item in chain])
-    else:
-        lines.append("_(empty)_")
-    lines.extend(
-        [
-            "",
-            "## Activity",
-            course_design.get("activity", "") or "_(empty)_",
-            "",
-            "## Experiment",
-            course_design.get("experiment", "") or "_(empty)_",
-        ]
-    )
-    return "\n".join(lines)
+def _write_files(gen_dir: str, files: Dict[str, str]) -> str:
+    os.makedirs(gen_dir, exist_ok=True)
+    for filename, content in files.items():
+        path = os.path.join(gen_dir, filename)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(content)
+    return gen_dir
 
 
-def write_generation_snapshot(session_id: str, state: Dict[str, Any], generation_index: int) -> str:
-    course_design = state.get("course_design", {}) or {}
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    session_dir = os.path.join(OUTPUT_DIR, session_id)
-    os.makedirs(session_dir, exist_ok=True)
+def _report_failure(future: Future) -> None:
+    exc = future.exception()
+    if exc is not None:
+        logger.error("快照写入失败", exc_info=exc)
+
 
+def write_generation_snapshot(
+    session_id: str,
+    state: Dict[str, Any],
+    generation_index: int,
+) -> "Future[str]":
+    """
+    在后台线程中写入本次生成的快照文件
+
+    Returns:
+        写入完成后结果为快照目录路径的 Future；返回时文件可能尚未写入，
+        需要读取快照的调用方应先调用 result() 等待
+    """
+    course_design = state.get("course_design", {}) or {}
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    gen_dir = os.path.join(session_dir, f"gen_{generation_index:03d}_{timestamp}")
-    os.makedirs(gen_dir, exist_ok=True)
+    gen_dir = os.path.join(OUTPUT_DIR, session_id, f"gen_{generation_index:03d}_{timestamp}")
 
+    # 文件内容在调用线程中生成，之后对 state 的修改不影响本次快照
     files = {
         "scenario.md": course_design.get("scenario", "") or "",
         "driving_question.md": course_design.get("driving_question", "") or "",
-        "question_chain.md": _question_chain_text(course_design),
+        "question_chain.md": question_chain_text(course_design),
         "activity.md": course_design.get("activity", "") or "",
         "experiment.md": course_design.get("experiment", "") or "",
-        "course_design.md": _course_design_markdown(course_design),
+        "course_design.md": course_design_markdown(course_design),
     }
 
-    for filename, content in files.items():
-        path = os.path.join(gen_dir, filename)
-        with open(path, "w", encoding="utf-8") as handle:
-            handle.write(content)
-    return gen_dir
+    future = _SNAPSHOT_POOL.submit(_write_files, gen_dir, files)
+    future.add_done_callback(_report_failure)
+    return future
@@ -1,8 +1,17 @@
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import uuid4
 
 
-SESSIONS: Dict[str, Dict[str, Any]] = {}
+# 会话按 session_id 分片存放，每个分片一把锁，不同会话的更新互不阻塞
+_SHARD_COUNT = 16
+_SHARDS: List[Tuple[threading.Lock, Dict[str, Dict[str, Any]]]] = [
+    (threading.Lock(), {}) for _ in range(_SHARD_COUNT)
+]
+
+
+def _shard(session_id: str) -> Tuple[threading.Lock, Dict[str, Dict[str, Any]]]:
+    return _SHARDS[hash(session_id) % _SHARD_COUNT]
 
 
 def create_session(
@@ -12,54 +21,95 @@ def create_session(
     messages: Optional[List[Dict[str, Any]]] = None,
 ) -> str:
     session_id = uuid4().hex
-    SESSIONS[session_id] = {
-        "config": config,
-        "state": state,
-        "generation_count": 0,
-        "task": task,
-        "messages": messages or [],
-    }
+    lock, sessions = _shard(session_id)
+    with lock:
+        sessions[session_id] = {
+            "config": config,
+            "state": state,
+            "generation_count": 0,
+            "task": task,
+            "messages": messages or [],
+            # 已出现过的消息文本，用于按内容去重
+            "message_texts": {msg.get("message") for msg in messages or []},
+            # 由当前 state 生成的虚拟文件，state 更新时失效
+            "virtual_files": None,
+        }
     return session_id
 
 
 def get_session(session_id: str) -> Dict[str, Any]:
-    return SESSIONS.get(session_id)
+    _lock, sessions = _shard(session_id)
+    return sessions.get(session_id)
+
+
+def _set_field(session_id: str, field: str, value: Any) -> None:
+    lock, sessions = _shard(session_id)
+    with lock:
+        session = sessions.get(session_id)
+        if session is not None:
+            session[field] = value
 
 
 def update_state(session_id: str, state: Dict[str, Any]) -> None:
-    if session_id in SESSIONS:
-        SESSIONS[session_id]["state"] = state
+    lock, sessions = _shard(session_id)
+    with lock:
+        session = sessions.get(session_id)
+        if session is not None:
+            session["state"] = state
+            session["virtual_files"] = None
+
+
+def set_virtual_files(
+    session_id: str,
+    state: Dict[str, Any],
+    virtual_files: Dict[str, Any],
+) -> None:
+    """缓存由 state 生成的虚拟文件；若会话的 state 已被替换则丢弃，避免写回过期内容"""
+    lock, sessions = _shard(session_id)
+    with lock:
+        session = sessions.get(session_id)
+        if session is not None and session["state"] is state:
+            session["virtual_files"] = virtual_files
 
 
 def update_config(session_id: str, config: Dict[str, Any]) -> None:
-    if session_id in SESSIONS:
-        SESSIONS[session_id]["config"] = config
+    _set_field(session_id, "config", config)
 
 
 def update_task(session_id: str, task: Dict[str, Any]) -> None:
-    if session_id in SESSIONS:
-        SESSIONS[session_id]["task"] = task
+    _set_field(session_id, "task", task)
 
 
 def set_messages(session_id: str, messages: List[Dict[str, Any]]) -> None:
-    if session_id in SESSIONS:
-        SESSIONS[session_id]["messages"] = messages
+    lock, sessions = _shard(session_id)
+    with lock:
+        session = sessions.get(session_id)
+        if session is not None:
+            session["messages"] = messages
+            session["message_texts"] = {msg.get("message") for msg in messages}
 
 
 def append_messages(session_id: str, messages: List[Dict[str, Any]]) -> None:
-    if session_id in SESSIONS:
-        current = SESSIONS[session_id].setdefault("messages", [])
-        current.extend(messages)
+    lock, sessions = _shard(session_id)
+    with lock:
+        session = sessions.get(session_id)
+        if session is not None:
+            session.setdefault("messages", []).extend(messages)
+            session.setdefault("message_texts", set()).update(
+                msg.get("message") for msg in messages
+            )
 
 
 def increment_generation(session_id: str) -> int:
-    if session_id in SESSIONS:
-        current = SESSIONS[session_id].get("generation_count", 0) + 1
-        SESSIONS[session_id]["generation_count"] = current
+    lock, sessions = _shard(session_id)
+    with lock:
+        session = sessions.get(session_id)
+        if session is None:
+            return 0
+        current = session.get("generation_count", 0) + 1
+        session["generation_count"] = current
         return current
-    return 0
 
 
 def reset_generation(session_id: str) -> None:
-    if session_id in SESSIONS:
-        SESSIONS[session_id]["generation_count"] = 0
+    _set_field(session_id, "generation_count", 0)
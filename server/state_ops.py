@@ -4,6 +4,42 @@ from typing import Any, Dict, List, Optional, Tuple
 
 from config import DEEPSEEK_API_KEY, get_llm
 from langchain_core.prompts import ChatPromptTemplate
+from tools.llm_cache import cached_invoke
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库
+    _json_loads = json.loads
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+_BULLET_PREFIX = re.compile(r"^[-*]\s+")
+_NUMBER_PREFIX = re.compile(r"^\d+[.)]\s+")
+# 用户明确声明已有组件时的起点识别规则（按顺序匹配）
+_EXPLICIT_START_PATTERNS = [
+    (re.compile(r"\bscenario\s*:"), "scenario"),
+    (re.compile(r"\bactivity\s*:"), "activity"),
+    (re.compile(r"\bexperiment\s*:"), "experiment"),
+    (re.compile(r"已有场景|我有场景|给定场景|场景如下"), "scenario"),
+    (re.compile(r"已有活动|活动如下"), "activity"),
+    (re.compile(r"已有实验|实验如下"), "experiment"),
+]
+
+# 起点路由 Prompt（固定不变，模块加载时构建一次）
+_START_FROM_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "You are a router. Decide which component the user already has. "
+            "If the user explicitly mentions or labels a component (e.g., "
+            "\"scenario:\" / \"activity:\" / \"experiment:\" / \"已有场景\"), "
+            "choose that component. Return JSON only: "
+            "{{\"start_from\":\"topic|scenario|activity|experiment\"}}.",
+        ),
+        ("user", "{user_input}"),
+    ]
+)
 
 
 def build_user_input(user_input: str, topic: str, grade_level: str, duration: int) -> str:
@@ -18,10 +54,15 @@ def _parse_start_from(text: str) -> Optional[str]:
     if not text:
         return None
     cleaned = text.strip()
-    match = re.search(r"\{.*\}", cleaned, re.DOTALL)
-    if match:
+    # 常见情况：回复本身就是一个 JSON 对象，无需正则提取
+    if cleaned.startswith("{") and cleaned.endswith("}"):
+        candidate: Optional[str] = cleaned
+    else:
+        match = _JSON_OBJECT.search(cleaned)
+        candidate = match.group(0) if match else None
+    if candidate:
         try:
-            payload = json.loads(match.group(0))
+            payload = _json_loads(candidate)
             if isinstance(payload, dict):
                 value = str(payload.get("start_from", "")).strip().lower()
                 if value in {"topic", "scenario", "activity", "experiment"}:
@@ -38,16 +79,8 @@ def _parse_start_from(text: str) -> Optional[str]:
 
 def _explicit_start_from(user_input: str) -> Optional[str]:
     text = (user_input or "").lower()
-    explicit_patterns = [
-        (r"\bscenario\s*:", "scenario"),
-        (r"\bactivity\s*:", "activity"),
-        (r"\bexperiment\s*:", "experiment"),
-        (r"已有场景|我有场景|给定场景|场景如下", "scenario"),
-        (r"已有活动|活动如下", "activity"),
-        (r"已有实验|实验如下", "experiment"),
-    ]
-    for pattern, value in explicit_patterns:
-        if re.search(pattern, text):
+    for pattern, value in _EXPLICIT_START_PATTERNS:
+        if pattern.search(text):
             return value
     return None
 
@@ -80,22 +113,13 @@ def _llm_start_from(user_input: str) -> Optional[str]:
     if not user_input.strip() or not DEEPSEEK_API_KEY:
         return None
     try:
-        llm = get_llm(temperature=0)
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "You are a router. Decide which component the user already has. "
-                    "If the user explicitly mentions or labels a component (e.g., "
-                    "\"scenario:\" / \"activity:\" / \"experiment:\" / \"已有场景\"), "
-                    "choose that component. Return JSON only: "
-                    "{\"start_from\":\"topic|scenario|activity|experiment\"}.",
-                ),
-                ("user", "{user_input}"),
-            ]
-        )
-        response = (prompt | llm).invoke({"user_input": user_input})
-        return _parse_start_from(response.content or "")
+        def _invoke(payload: Dict[str, Any]) -> str:
+            response = (_START_FROM_PROMPT | get_llm(temperature=0)).invoke(payload)
+            return response.content or ""
+
+        # temperature=0 的路由结果是确定的，相同输入直接复用
+        content = cached_invoke("start_from_router", {"user_input": user_input}, _invoke)
+        return _parse_start_from(content)
     except Exception:
         return None
 
@@ -124,7 +148,7 @@ def parse_question_chain(content: str) -> List[str]:
     if not text:
         return []
     try:
-        data = json.loads(text)
+        data = _json_loads(text)
         if isinstance(data, list):
             return [str(item).strip() for item in data if str(item).strip()]
     except json.JSONDecodeError:
@@ -133,8 +157,8 @@ def parse_question_chain(content: str) -> List[str]:
     lines = [line.strip() for line in text.splitlines() if line.strip()]
     result: List[str] = []
     for line in lines:
-        line = re.sub(r"^[-*]\s+", "", line)
-        line = re.sub(r"^\d+[.)]\s+", "", line)
+        line = _BULLET_PREFIX.sub("", line)
+        line = _NUMBER_PREFIX.sub("", line)
         cleaned = line.strip()
         if cleaned:
             result.append(cleaned)
@@ -3,7 +3,7 @@ from __future__ import annotations
 import time
 from typing import Any, Dict, List
 
-from state.agent_state import AgentState, is_design_complete
+from state.agent_state import REQUIRED_COMPONENTS, AgentState, is_design_complete
 
 
 STAGE_LABELS: Dict[str, str] = {
@@ -16,7 +16,7 @@ STAGE_LABELS: Dict[str, str] = {
 
 
 def _required_stages(start_from: str) -> List[str]:
-    return ["scenario", "driving_question", "question_chain", "activity", "experiment"]
+    return list(REQUIRED_COMPONENTS)
 
 
 def stage_label(stage: str) -> str:
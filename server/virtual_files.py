@@ -1,6 +1,8 @@
 import json
 from typing import Any, Dict, List
 
+from state.agent_state import REQUIRED_COMPONENTS
+
 
 COMPONENT_FILES = {
     "scenario": "course/scenario.md",
@@ -33,12 +35,12 @@ def _status_for(component: str, state: Dict[str, Any]) -> str:
     return "empty"
 
 
-def _question_chain_text(course_design: Dict[str, Any]) -> str:
+def question_chain_text(course_design: Dict[str, Any]) -> str:
     chain = course_design.get("question_chain", []) or []
     return "\n".join(f"- {item}" for item in chain)
 
 
-def _course_design_markdown(course_design: Dict[str, Any]) -> str:
+def course_design_markdown(course_design: Dict[str, Any]) -> str:
     lines = [
         "# Course Design",
         "",
@@ -70,8 +72,7 @@ def _course_design_markdown(course_design: Dict[str, Any]) -> str:
 
 def _is_complete(state: Dict[str, Any]) -> bool:
     progress = state.get("design_progress", {}) or {}
-    required = ["scenario", "driving_question", "question_chain", "activity", "experiment"]
-    return all(progress.get(key) for key in required)
+    return all(progress.get(key) for key in REQUIRED_COMPONENTS)
 
 
 def build_virtual_files(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -102,7 +103,7 @@ def build_virtual_files(state: Dict[str, Any]) -> Dict[str, Any]:
             "language": "markdown",
             "editable": True,
             "status": _status_for("question_chain", state),
-            "content": _question_chain_text(course_design),
+            "content": question_chain_text(course_design),
         }
     )
     files.append(
@@ -130,7 +131,7 @@ def build_virtual_files(state: Dict[str, Any]) -> Dict[str, Any]:
             "language": "markdown",
             "editable": False,
             "status": "info",
-            "content": _course_design_markdown(course_design),
+            "content": course_design_markdown(course_design),
         }
     )
 
@@ -5,6 +5,9 @@ LangGraph 工作流的全局状态管理
 
 from typing import TypedDict, Optional, Dict, List, Any
 
+# 课程设计完成所需的全部组件（问题链单独计入）
+REQUIRED_COMPONENTS = ("scenario", "driving_question", "question_chain", "activity", "experiment")
+
 
 class CourseDesign(TypedDict):
     """课程设计方案"""
@@ -199,6 +202,4 @@ def is_design_complete(state: AgentState) -> bool:
         所有组件是否都已完成
     """
     progress = state["design_progress"]
-    required = ["scenario", "driving_question", "question_chain", "activity", "experiment"]
-
-    return all(progress.get(k, False) for k in required)
+    return all(progress.get(k, False) for k in REQUIRED_COMPONENTS)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+驱动问题工具离线测试 - 使用固定的模型输出验证问题链解析（不调用真实 LLM）
+"""
+
+import os
+import sys
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+# 添加项目根目录到路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from tools.generate_driving_question import generate_driving_question
+
+PLACEHOLDER = "（待补充：请生成一个可探究的子问题）"
+
+
+def _fake_llm(*responses):
+    """按顺序返回固定文本的假 LLM，并记录调用次数"""
+    calls = []
+
+    def _respond(prompt_value):
+        calls.append(prompt_value)
+        return AIMessage(content=responses[min(len(calls), len(responses)) - 1])
+
+    return RunnableLambda(_respond), calls
+
+
+def _generate(llm):
+    return generate_driving_question(
+        scenario="校园里的智能垃圾分类",
+        grade_level="初中",
+        context_summary="初中生具备基础的逻辑推理能力",
+        llm=llm,
+    )
+
+
+def test_numbered_question_chain():
+    llm, calls = _fake_llm(
+        "### 驱动问题\n机器怎样认出垃圾？\n\n"
+        "### 问题链\n1. 垃圾有哪些特征？\n2、机器如何提取特征？\n3. 认错了怎么办？\n4. 多余的问题？\n"
+    )
+    result = _generate(llm)
+    assert result["driving_question"] == "机器怎样认出垃圾？"
+    assert result["question_chain"] == ["垃圾有哪些特征？", "机器如何提取特征？", "认错了怎么办？"]
+    assert len(calls) == 1
+
+
+def test_bullet_question_chain_is_kept():
+    llm, calls = _fake_llm(
+        "### 驱动问题\n机器怎样认出垃圾？\n\n"
+        "### 问题链\n- 垃圾有哪些特征？\n- 机器如何提取特征？\n- 认错了怎么办？\n\n"
+        "### 问题解读\n说明文字。\n"
+    )
+    result = _generate(llm)
+    assert result["question_chain"] == ["垃圾有哪些特征？", "机器如何提取特征？", "认错了怎么办？"]
+    # 本地补救成功，不再重试
+    assert len(calls) == 1
+
+
+def test_too_few_items_retries_then_pads():
+    response = "### 驱动问题\n机器怎样认出垃圾？\n\n### 问题链\n1. 垃圾有哪些特征？\n2. 机器如何提取特征？\n"
+    llm, calls = _fake_llm(response)
+    result = _generate(llm)
+    assert result["question_chain"] == ["垃圾有哪些特征？", "机器如何提取特征？", PLACEHOLDER]
+    assert len(calls) == 2
+    assert "问题链必须恰好3个子问题" in calls[1].to_string()
+
+
+def test_retry_result_is_used():
+    llm, calls = _fake_llm(
+        "### 驱动问题\n机器怎样认出垃圾？\n\n### 问题链\n1. 只有一个？\n",
+        "### 驱动问题\n机器怎样认出垃圾？\n\n### 问题链\n1. 问题一？\n2. 问题二？\n3. 问题三？\n",
+    )
+    result = _generate(llm)
+    assert result["question_chain"] == ["问题一？", "问题二？", "问题三？"]
+    assert len(calls) == 2
+
+
+def test_no_list_at_all():
+    llm, calls = _fake_llm("### 驱动问题\n机器怎样认出垃圾？\n\n这里只有一段说明，没有列出任何子问题。\n")
+    result = _generate(llm)
+    assert result["driving_question"] == "机器怎样认出垃圾？"
+    assert result["question_chain"] == [PLACEHOLDER] * 3
+    assert len(calls) == 2
+
+
+def test_mixed_markers_are_all_stripped():
+    # 编号与项目符号混用时，本地补救需去掉全部标记
+    llm, calls = _fake_llm(
+        "### 驱动问题\n机器怎样认出垃圾？\n\n"
+        "### 问题链\n1. 甲是什么？\n2. 乙是什么？\n- 丙是什么？"
+    )
+    result = _generate(llm)
+    assert result["question_chain"] == ["甲是什么？", "乙是什么？", "丙是什么？"]
+    assert len(calls) == 1
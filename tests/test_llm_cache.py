@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 响应缓存离线测试 - 使用假的调用函数验证复用、并发合并、过期与淘汰
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# 添加项目根目录到路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from tools import llm_cache
+from tools.llm_cache import cached_invoke, clear_cache
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    clear_cache()
+    yield
+    clear_cache()
+
+
+class FakeInvoke:
+    """记录调用次数的假 LLM 调用"""
+
+    def __init__(self, result="结果", delay=0.0, error=None):
+        self.calls = 0
+        self.result = result
+        self.delay = delay
+        self.error = error
+        self._lock = threading.Lock()
+
+    def __call__(self, payload):
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return f"{self.result}:{payload['topic']}"
+
+
+def test_repeated_calls_hit_cache():
+    invoke = FakeInvoke()
+    assert cached_invoke("summary", {"topic": "图像识别"}, invoke) == "结果:图像识别"
+    assert cached_invoke("summary", {"topic": "图像识别"}, invoke) == "结果:图像识别"
+    assert invoke.calls == 1
+    # 不同命名空间或不同变量不共用缓存
+    cached_invoke("router", {"topic": "图像识别"}, invoke)
+    cached_invoke("summary", {"topic": "语音识别"}, invoke)
+    assert invoke.calls == 3
+
+
+def test_concurrent_callers_share_one_call():
+    invoke = FakeInvoke(delay=0.2)
+    results = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        results.append(cached_invoke("summary", {"topic": "图像识别"}, invoke))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert invoke.calls == 1
+    assert results == ["结果:图像识别"] * 8
+
+
+def test_exception_reaches_every_waiter_and_is_not_cached():
+    failing = FakeInvoke(delay=0.2, error=RuntimeError("请求失败"))
+    errors = []
+    barrier = threading.Barrier(4)
+
+    def worker():
+        barrier.wait()
+        try:
+            cached_invoke("summary", {"topic": "图像识别"}, failing)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert failing.calls == 1
+    assert errors == ["请求失败"] * 4
+
+    # 失败结果不缓存，下一次调用重新请求
+    invoke = FakeInvoke()
+    assert cached_invoke("summary", {"topic": "图像识别"}, invoke) == "结果:图像识别"
+    assert invoke.calls == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "monotonic", lambda: now[0])
+    invoke = FakeInvoke()
+
+    cached_invoke("summary", {"topic": "图像识别"}, invoke)
+    now[0] += llm_cache.TTL_SECONDS - 1
+    cached_invoke("summary", {"topic": "图像识别"}, invoke)
+    assert invoke.calls == 1
+
+    now[0] += 1
+    cached_invoke("summary", {"topic": "图像识别"}, invoke)
+    assert invoke.calls == 2
+
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    monkeypatch.setattr(llm_cache, "MAX_ENTRIES", 2)
+    invoke = FakeInvoke()
+
+    cached_invoke("summary", {"topic": "a"}, invoke)
+    cached_invoke("summary", {"topic": "b"}, invoke)
+    # 访问 a 使其成为最近使用，再写入 c 时淘汰 b
+    cached_invoke("summary", {"topic": "a"}, invoke)
+    cached_invoke("summary", {"topic": "c"}, invoke)
+    assert invoke.calls == 3
+
+    cached_invoke("summary", {"topic": "a"}, invoke)
+    assert invoke.calls == 3
+    cached_invoke("summary", {"topic": "b"}, invoke)
+    assert invoke.calls == 4
+
+
+def test_clear_cache():
+    invoke = FakeInvoke()
+    cached_invoke("summary", {"topic": "图像识别"}, invoke)
+    clear_cache()
+    cached_invoke("summary", {"topic": "图像识别"}, invoke)
+    assert invoke.calls == 2
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+推理节点离线测试 - 用户输入解析（不调用 LLM）
+"""
+
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from nodes.reasoning_node import _detect_grade, parse_user_input
+
+
+@pytest.mark.parametrize(
+    "user_input, expected",
+    [
+        (
+            "为初中二年级设计'AI如何识别交通标志'PBL课程，45分钟",
+            {"topic": "'AI如何识别交通标志'", "grade_level": "初中", "duration": 45},
+        ),
+        (
+            "高中，讨论AI伦理问题，两节课",
+            {"topic": "讨论AI伦理问题，两节课", "grade_level": "高中", "duration": 80},
+        ),
+        (
+            "小学三年级 图像识别 40 + 40",
+            {"topic": "图像识别 40 + 40", "grade_level": "小学", "duration": 80},
+        ),
+        ("", {"topic": "AI通识教育", "grade_level": "初中", "duration": 80}),
+        # 去掉年级词后两侧文字拼成新的无关词，也要继续去除
+        ("，设小学计初中 ", {"topic": "AI通识教育", "grade_level": "小学", "duration": 80}),
+        ("设高中计课程", {"topic": "AI通识教育", "grade_level": "高中", "duration": 80}),
+        ("初小学中语音识别", {"topic": "语音识别", "grade_level": "小学", "duration": 80}),
+        ("图像识别30初中分钟", {"topic": "图像识别", "grade_level": "初中", "duration": 80}),
+    ],
+)
+def test_parse_user_input(user_input, expected):
+    assert parse_user_input(user_input, {}) == expected
+
+
+def test_parse_user_input_prefers_state():
+    state = {"topic": "语音识别", "grade_level": "小学", "duration": 45}
+    assert parse_user_input("高中 图像识别 90分钟", state) == state
+
+
+@pytest.mark.parametrize(
+    "user_input, grade",
+    [
+        ("小学", "小学"),
+        ("初中", "初中"),
+        ("高中", "高中"),
+        ("小学五年级", "小学"),
+        ("初中二年", "初中"),
+        ("高中三年级", "高中"),
+        ("初中2年级", "初中"),
+        ("高中3年级 机器学习", "高中"),
+        # 具体年级优先于单独出现的学段
+        ("小学和初中二年级", "初中"),
+        ("高中一年级，参考小学案例", "高中"),
+        # 都没有具体年级时按 小学 > 初中 > 高中
+        ("高中或初中", "初中"),
+        # 数字超出学段范围时只按学段识别
+        ("初中四年级与高中", "初中"),
+        ("七年级 图像识别", ""),
+        ("", ""),
+    ],
+)
+def test_detect_grade(user_input, grade):
+    assert _detect_grade(user_input) == grade
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+起点路由离线测试 - 使用假的 LLM 验证 start_from 路由与响应缓存（不调用真实 LLM）
+"""
+
+import os
+import sys
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+# 添加项目根目录到路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from server import state_ops
+from server.state_ops import determine_start_from
+from tools.llm_cache import clear_cache
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    clear_cache()
+    yield
+    clear_cache()
+
+
+@pytest.fixture
+def fake_router(monkeypatch):
+    """替换路由使用的 LLM，返回固定的 JSON 并记录收到的 prompt"""
+    calls = []
+
+    def _respond(prompt_value):
+        calls.append(prompt_value)
+        return AIMessage(content='{"start_from": "activity"}')
+
+    monkeypatch.setattr(state_ops, "DEEPSEEK_API_KEY", "test-key")
+    llm = RunnableLambda(_respond)
+    monkeypatch.setattr(state_ops, "get_llm", lambda temperature=0.7: llm)
+    return calls
+
+
+def test_llm_router_result_is_used(fake_router):
+    assert determine_start_from("我想先讨论课堂活动怎么安排") == "activity"
+    assert len(fake_router) == 1
+    prompt_text = fake_router[0].to_string()
+    assert '{"start_from":"topic|scenario|activity|experiment"}' in prompt_text
+    assert "我想先讨论课堂活动怎么安排" in prompt_text
+
+
+def test_router_response_is_cached(fake_router):
+    assert determine_start_from("我想先讨论课堂活动怎么安排") == "activity"
+    assert determine_start_from("我想先讨论课堂活动怎么安排") == "activity"
+    assert len(fake_router) == 1
+    # 不同输入重新请求
+    determine_start_from("图像识别课程")
+    assert len(fake_router) == 2
+
+
+def test_explicit_label_skips_llm(fake_router):
+    assert determine_start_from("scenario: 校园垃圾分类") == "scenario"
+    assert fake_router == []
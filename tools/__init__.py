@@ -37,6 +37,7 @@ def get_tool(tool_name: str):
     Raises:
         ValueError: 工具名称无效
     """
-    if tool_name not in TOOL_REGISTRY:
+    tool = TOOL_REGISTRY.get(tool_name)
+    if tool is None:
         raise ValueError(f"Unknown tool: {tool_name}. Available tools: {list(TOOL_REGISTRY.keys())}")
-    return TOOL_REGISTRY[tool_name]
+    return tool
@@ -3,21 +3,11 @@
 根据驱动问题和时长生成完整的课堂活动方案
 """
 
-import os
 from typing import Dict, Any
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
 
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import PROMPTS_PATH, get_llm
-
-
-def load_prompt_template() -> str:
-    """加载活动设计的 Prompt 模板"""
-    template_path = os.path.join(PROMPTS_PATH, "activity.txt")
-    with open(template_path, "r", encoding="utf-8") as f:
-        return f.read()
+from config import get_llm
+from tools.prompt_utils import format_safety_constraints, get_prompt
 
 
 def get_duration_guidelines(duration: int) -> str:
@@ -88,9 +78,6 @@ def generate_activity(
     if llm is None:
         llm = get_llm()
 
-    # 加载模板
-    template = load_prompt_template()
-
     # 获取时间分配指南
     duration_guidelines = get_duration_guidelines(duration)
 
@@ -103,17 +90,10 @@ def generate_activity(
     )
 
     # 格式化安全约束
-    safety_constraints = knowledge_snippets.get("safety_constraints", [])
-    if isinstance(safety_constraints, list):
-        safety_str = "\n".join(f"- {item}" for item in safety_constraints)
-    else:
-        safety_str = str(safety_constraints)
-
-    # 创建 Prompt
-    prompt = ChatPromptTemplate.from_template(template)
+    safety_str = format_safety_constraints(knowledge_snippets.get("safety_constraints", []))
 
     # 构建链
-    chain = prompt | llm
+    chain = get_prompt("activity.txt") | llm
 
     # 调用 LLM
     result = chain.invoke({
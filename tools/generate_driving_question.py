@@ -3,21 +3,20 @@
 根据教学场景生成驱动问题和问题链
 """
 
-import os
+import re
 from typing import Dict, Any, List
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
 
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import PROMPTS_PATH, get_llm
+from config import get_llm
+from tools.prompt_utils import get_prompt
 
+# 问题链中 "1. "、"1、" 格式的编号子问题
+_NUMBERED_ITEM = re.compile(r"^\d+[.、]\s*(.+)")
+# 问题链中的各类列表标记：- * • 1. 1、 （1） (1) 1) ① 等
+_LIST_MARKER = re.compile(r"^(?:[-*•·]|\d+[.、．]|[（(]?\d+[)）]|[①-⑩])\s*")
 
-def load_prompt_template() -> str:
-    """加载驱动问题的 Prompt 模板"""
-    template_path = os.path.join(PROMPTS_PATH, "driving_question.txt")
-    with open(template_path, "r", encoding="utf-8") as f:
-        return f.read()
+# 候选方案编号 A、B、C……
+_CANDIDATE_IDS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
 
 
 def parse_question_chain(response_text: str) -> List[str]:
@@ -49,14 +48,106 @@ def parse_question_chain(response_text: str) -> List[str]:
         # 提取编号的问题
         if in_question_chain and line:
             # 匹配 "1. "、"1、" 等格式
-            import re
-            match = re.match(r"^\d+[.、]\s*(.+)", line)
+            match = _NUMBERED_ITEM.match(line)
             if match:
                 questions.append(match.group(1).strip())
 
     return questions
 
 
+def _salvage_question_chain(response_text: str) -> List[str]:
+    """
+    问题链未按“1. ”编号输出时，从问题链段落中按问句行本地提取
+
+    Args:
+        response_text: LLM 返回的文本
+
+    Returns:
+        问题链列表
+    """
+    questions = []
+    in_question_chain = False
+    for line in response_text.split("\n"):
+        line = line.strip()
+        if "问题链" in line:
+            in_question_chain = True
+            continue
+        if not in_question_chain or not line:
+            continue
+        if line.startswith("###"):
+            break
+        question = _LIST_MARKER.sub("", line, count=1).strip()
+        if question.endswith(("？", "?")):
+            questions.append(question)
+    return questions
+
+
+def _extract_question_chain(response_text: str) -> List[str]:
+    """解析问题链；编号格式不足 3 个时先本地补救，避免不必要的 LLM 重试"""
+    question_chain = parse_question_chain(response_text)
+    if len(question_chain) < 3:
+        salvaged = _salvage_question_chain(response_text)
+        if len(salvaged) > len(question_chain):
+            return salvaged
+    return question_chain
+
+
+def _build_chain(llm: ChatOpenAI):
+    """加载模板并构建 prompt | llm 链"""
+    return get_prompt("driving_question.txt") | llm
+
+
+def _build_inputs(
+    scenario: str,
+    grade_level: str,
+    context_summary: str,
+    user_feedback: str = "",
+) -> Dict[str, Any]:
+    """组装驱动问题模板所需的变量"""
+    return {
+        "scenario": scenario,
+        "grade_level": grade_level,
+        "context_summary": context_summary,
+        "user_feedback": user_feedback or "无",
+    }
+
+
+def _retry_feedback(user_feedback: str) -> str:
+    """问题链不足 3 个时用于重试的修改要求"""
+    return (user_feedback + "；" if user_feedback else "") + "问题链必须恰好3个子问题，不多不少。"
+
+
+def parse_driving_question(response_text: str) -> str:
+    """
+    从响应文本中解析驱动问题
+
+    Args:
+        response_text: LLM 返回的文本
+
+    Returns:
+        驱动问题
+    """
+    lines = response_text.split("\n")
+    for i, line in enumerate(lines):
+        if "驱动问题" in line and "###" in line:
+            # 获取下一行作为驱动问题
+            if i + 1 < len(lines):
+                # 去除可能的方括号
+                return lines[i + 1].strip().strip("[]")
+            break
+    return ""
+
+
+def _fit_question_chain(question_chain: List[str]) -> List[str]:
+    """硬约束：问题链保留恰好 3 个子问题"""
+    if len(question_chain) >= 3:
+        return question_chain[:3]
+    # Pad with placeholders if still insufficient
+    while len(question_chain) < 3:
+        question_chain.append("（待补充：请生成一个可探究的子问题）")
+    return question_chain
+
+
 def generate_driving_question(
     scenario: str,
     grade_level: str,
@@ -79,62 +170,28 @@ def generate_driving_question(
     if llm is None:
         llm = get_llm()
 
-    # 加载模板
-    template = load_prompt_template()
-
-    # 创建 Prompt
-    prompt = ChatPromptTemplate.from_template(template)
-
     # 构建链
-    chain = prompt | llm
+    chain = _build_chain(llm)
+    inputs = _build_inputs(scenario, grade_level, context_summary, user_feedback)
 
     # 调用 LLM
-    result = chain.invoke({
-        "scenario": scenario,
-        "grade_level": grade_level,
-        "context_summary": context_summary,
-        "user_feedback": user_feedback or "无",
-    })
-
+    result = chain.invoke(inputs)
     response_text = result.content
 
     # 解析驱动问题
-    driving_question = ""
-    lines = response_text.split("\n")
-    for i, line in enumerate(lines):
-        if "驱动问题" in line and "###" in line:
-            # 获取下一行作为驱动问题
-            if i + 1 < len(lines):
-                driving_question = lines[i + 1].strip()
-                # 去除可能的方括号
-                driving_question = driving_question.strip("[]")
-            break
+    driving_question = parse_driving_question(response_text)
 
     # 解析问题链
-    question_chain = parse_question_chain(response_text)
+    question_chain = _extract_question_chain(response_text)
     if len(question_chain) < 3:
         # Retry once with explicit constraint
-        retry_feedback = (user_feedback + "；" if user_feedback else "") + "问题链必须恰好3个子问题，不多不少。"
-        result = chain.invoke({
-            "scenario": scenario,
-            "grade_level": grade_level,
-            "context_summary": context_summary,
-            "user_feedback": retry_feedback,
-        })
+        result = chain.invoke({**inputs, "user_feedback": _retry_feedback(user_feedback)})
         response_text = result.content
-        question_chain = parse_question_chain(response_text)
-
-    # Hard constraint: keep exactly 3
-    if len(question_chain) >= 3:
-        question_chain = question_chain[:3]
-    else:
-        # Pad with placeholders if still insufficient
-        while len(question_chain) < 3:
-            question_chain.append("（待补充：请生成一个可探究的子问题）")
+        question_chain = _extract_question_chain(response_text)
 
     return {
         "driving_question": driving_question,
-        "question_chain": question_chain,
+        "question_chain": _fit_question_chain(question_chain),
         "raw_response": response_text,
     }
 
@@ -149,27 +206,49 @@ def generate_driving_question_candidates(
 ) -> List[Dict[str, Any]]:
     """
     生成多个驱动问题候选方案
+
+    各方案的请求通过一次 chain.batch 提交，由 LangChain 并发发出，
+    总耗时约为单次调用耗时而非 count 倍。
     """
     if llm is None:
         llm = get_llm()
-    candidates: List[Dict[str, Any]] = []
-    for index in range(count):
-        hint = f"请提供第{index + 1}个不同角度的驱动问题方案。"
-        feedback = f"{user_feedback}；{hint}" if user_feedback else hint
-        result = generate_driving_question(
-            scenario=scenario,
-            grade_level=grade_level,
-            context_summary=context_summary,
-            user_feedback=feedback,
-            llm=llm,
+    chain = _build_chain(llm)
+    base_inputs = _build_inputs(scenario, grade_level, context_summary)
+
+    prefix = f"{user_feedback}；" if user_feedback else ""
+    feedbacks = [
+        f"{prefix}请提供第{index + 1}个不同角度的驱动问题方案。" for index in range(count)
+    ]
+
+    # 所有方案一次性提交，保证 count 个请求同时在途
+    responses = chain.batch(
+        [{**base_inputs, "user_feedback": fb} for fb in feedbacks],
+        config={"max_concurrency": count},
+    )
+    driving_questions = [parse_driving_question(r.content) for r in responses]
+    question_chains = [_extract_question_chain(r.content) for r in responses]
+
+    # 问题链不足 3 个的方案一起重试一次
+    retry_indexes = [i for i, qc in enumerate(question_chains) if len(qc) < 3]
+    if retry_indexes:
+        retried = chain.batch(
+            [
+                {**base_inputs, "user_feedback": _retry_feedback(feedbacks[i])}
+                for i in retry_indexes
+            ],
+            config={"max_concurrency": len(retry_indexes)},
         )
-        candidate_id = chr(65 + index)
+        for i, result in zip(retry_indexes, retried):
+            question_chains[i] = _extract_question_chain(result.content)
+
+    candidates: List[Dict[str, Any]] = []
+    for index, candidate_id in zip(range(count), _CANDIDATE_IDS):
         candidates.append(
             {
                 "id": candidate_id,
-                "title": result.get("driving_question", ""),
-                "driving_question": result.get("driving_question", ""),
-                "question_chain": result.get("question_chain", []),
+                "title": driving_questions[index],
+                "driving_question": driving_questions[index],
+                "question_chain": _fit_question_chain(question_chains[index]),
                 "rationale": "",
             }
         )
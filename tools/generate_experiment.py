@@ -3,21 +3,11 @@
 根据主题和活动背景生成动手实验方案
 """
 
-import os
 from typing import Dict, Any
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
 
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import PROMPTS_PATH, get_llm
-
-
-def load_prompt_template() -> str:
-    """加载实验设计的 Prompt 模板"""
-    template_path = os.path.join(PROMPTS_PATH, "experiment.txt")
-    with open(template_path, "r", encoding="utf-8") as f:
-        return f.read()
+from config import get_llm
+from tools.prompt_utils import format_safety_constraints, get_prompt
 
 
 def generate_experiment(
@@ -50,24 +40,14 @@ def generate_experiment(
     if llm is None:
         llm = get_llm()
 
-    # 加载模板
-    template = load_prompt_template()
-
     # 格式化安全约束
-    safety_constraints = knowledge_snippets.get("safety_constraints", [])
-    if isinstance(safety_constraints, list):
-        safety_str = "\n".join(f"- {item}" for item in safety_constraints)
-    else:
-        safety_str = str(safety_constraints)
+    safety_str = format_safety_constraints(knowledge_snippets.get("safety_constraints", []))
 
     # 提取年级规则
     grade_rules = knowledge_snippets.get("grade_rules", "")
 
-    # 创建 Prompt
-    prompt = ChatPromptTemplate.from_template(template)
-
     # 构建链
-    chain = prompt | llm
+    chain = get_prompt("experiment.txt") | llm
 
     # 调用 LLM
     result = chain.invoke({
@@ -3,21 +3,45 @@
 根据主题、年级和上下文生成教学场景
 """
 
-import os
+import re
 from typing import Dict, Any, List
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
 
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import PROMPTS_PATH, get_llm
+from config import get_llm
+from tools.prompt_utils import get_prompt
 
+# 候选方案编号 A、B、C……
+_CANDIDATE_IDS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
 
-def load_prompt_template() -> str:
-    """加载场景生成的 Prompt 模板"""
-    template_path = os.path.join(PROMPTS_PATH, "scenario.txt")
-    with open(template_path, "r", encoding="utf-8") as f:
-        return f.read()
+# “### 场景名称”标题后的第一行非空内容
+_TITLE_AFTER_HEADING = re.compile(r"^\s*###[^\n]*场景名称[^\n]*\n\s*(\S[^\n]*)", re.MULTILINE)
+# 第一行非空且不以 # 开头的文本
+_FIRST_TEXT_LINE = re.compile(r"^\s*([^#\s][^\n]*)", re.MULTILINE)
+
+
+def _build_chain(llm: ChatOpenAI):
+    """加载模板并构建 prompt | llm 链"""
+    return get_prompt("scenario.txt") | llm
+
+
+def _build_inputs(
+    topic: str,
+    grade_level: str,
+    duration: int,
+    context_summary: str,
+    knowledge_snippets: Dict[str, Any],
+    user_feedback: str = "",
+) -> Dict[str, Any]:
+    """组装场景模板所需的变量"""
+    return {
+        "topic": topic,
+        "grade_level": grade_level,
+        "duration": duration,
+        "context_summary": context_summary,
+        "grade_rules": knowledge_snippets.get("grade_rules", ""),
+        "topic_template": knowledge_snippets.get("topic_template", ""),
+        "user_feedback": user_feedback or "无",
+    }
 
 
 def generate_scenario(
@@ -46,50 +70,28 @@ def generate_scenario(
     if llm is None:
         llm = get_llm()
 
-    # 加载模板
-    template = load_prompt_template()
-
-    # 提取知识库信息
-    grade_rules = knowledge_snippets.get("grade_rules", "")
-    topic_template = knowledge_snippets.get("topic_template", "")
-
-    # 创建 Prompt
-    prompt = ChatPromptTemplate.from_template(template)
-
     # 构建链
-    chain = prompt | llm
+    chain = _build_chain(llm)
 
     # 调用 LLM
-    result = chain.invoke({
-        "topic": topic,
-        "grade_level": grade_level,
-        "duration": duration,
-        "context_summary": context_summary,
-        "grade_rules": grade_rules,
-        "topic_template": topic_template,
-        "user_feedback": user_feedback or "无",
-    })
+    result = chain.invoke(_build_inputs(
+        topic, grade_level, duration, context_summary, knowledge_snippets, user_feedback
+    ))
 
     return result.content
 
 
 def parse_scenario_title(response_text: str) -> str:
     """
-    浠庡搷搴旀枃鏈腑瑙ｆ瀽鍦烘櫙鍚嶇О
+    从响应文本中解析场景名称
+
+    优先取“### 场景名称”标题下的第一行非空内容，
+    否则取第一行非标题文本。
     """
     if not response_text:
         return ""
-    lines = [line.strip() for line in response_text.splitlines()]
-    for i, line in enumerate(lines):
-        if line.startswith("###") and "鍦烘櫙鍚嶇О" in line:
-            for j in range(i + 1, len(lines)):
-                candidate = lines[j].strip()
-                if candidate:
-                    return candidate.strip("[]")
-    for line in lines:
-        if line and not line.startswith("#"):
-            return line.strip("[]")
-    return ""
+    match = _TITLE_AFTER_HEADING.search(response_text) or _FIRST_TEXT_LINE.search(response_text)
+    return match.group(1).strip().strip("[]") if match else ""
 
 
 def generate_scenario_candidates(
@@ -103,29 +105,33 @@ def generate_scenario_candidates(
     llm: ChatOpenAI = None,
 ) -> List[Dict[str, Any]]:
     """
-    鐢熸垚澶氫釜鍦烘櫙鍊欓€夋柟妗?
+    生成多个场景候选方案
+
+    各方案的请求通过一次 chain.batch 并发发出，总耗时约为单次调用耗时。
     """
     if llm is None:
         llm = get_llm()
+    # 模板、链和公共变量在各候选方案间相同，只构建一次
+    chain = _build_chain(llm)
+    base_inputs = _build_inputs(
+        topic, grade_level, duration, context_summary, knowledge_snippets
+    )
+    prefix = f"{user_feedback}；" if user_feedback else ""
+    payloads = [
+        {**base_inputs, "user_feedback": f"{prefix}请提供第{index + 1}个不同角度的场景方案。"}
+        for index in range(count)
+    ]
+    # 所有方案一次性提交，保证 count 个请求同时在途
+    results = chain.batch(payloads, config={"max_concurrency": count})
+
     candidates: List[Dict[str, Any]] = []
-    for index in range(count):
-        hint = f"璇锋彁渚涚{index + 1}涓笉鍚岃搴︾殑鍦烘櫙鏂规銆?"
-        feedback = f"{user_feedback}；{hint}" if user_feedback else hint
-        scenario_text = generate_scenario(
-            topic=topic,
-            grade_level=grade_level,
-            duration=duration,
-            context_summary=context_summary,
-            knowledge_snippets=knowledge_snippets,
-            user_feedback=feedback,
-            llm=llm,
-        )
-        candidate_id = chr(65 + index)
+    for candidate_id, result in zip(_CANDIDATE_IDS, results):
+        scenario_text = result.content
         title = parse_scenario_title(scenario_text)
         candidates.append(
             {
                 "id": candidate_id,
-                "title": title or f"鏂规 {candidate_id}",
+                "title": title or f"方案 {candidate_id}",
                 "scenario": scenario_text,
                 "rationale": "",
             }
@@ -0,0 +1,95 @@
+"""
+LLM 响应缓存
+对输入完全相同的 LLM 调用复用已有结果，避免重复请求
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple
+
+# 进程内最多保留的响应条数（按最近使用淘汰）
+MAX_ENTRIES = 256
+# 单条响应的有效期（秒），过期后重新请求
+TTL_SECONDS = 3600
+
+# 键 -> (写入时间, 响应文本)
+_CACHE: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+# 正在请求中的键，相同输入的并发调用等待同一个结果
+_INFLIGHT: Dict[str, Future] = {}
+_LOCK = threading.Lock()
+
+
+def make_cache_key(namespace: str, payload: Dict[str, Any]) -> str:
+    """
+    根据调用类型和 Prompt 变量生成缓存键
+
+    Args:
+        namespace: 调用类型（区分不同 Prompt）
+        payload: 传给 chain.invoke 的变量字典
+
+    Returns:
+        sha256 十六进制字符串
+    """
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{namespace}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+def cached_invoke(
+    namespace: str,
+    payload: Dict[str, Any],
+    invoke: Callable[[Dict[str, Any]], str],
+) -> str:
+    """
+    命中未过期的缓存时直接返回，否则调用 invoke 并写入缓存
+
+    相同输入的并发调用只会发出一次请求，其余调用等待该请求的结果。
+
+    Args:
+        namespace: 调用类型
+        payload: Prompt 变量
+        invoke: 实际发起 LLM 请求的函数，返回文本内容
+
+    Returns:
+        LLM 响应文本
+    """
+    key = make_cache_key(namespace, payload)
+    with _LOCK:
+        entry = _CACHE.get(key)
+        if entry is not None:
+            if time.monotonic() - entry[0] < TTL_SECONDS:
+                _CACHE.move_to_end(key)
+                return entry[1]
+            del _CACHE[key]
+        pending = _INFLIGHT.get(key)
+        if pending is None:
+            future: Future = Future()
+            _INFLIGHT[key] = future
+    if pending is not None:
+        return pending.result()
+
+    try:
+        content = invoke(payload)
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        with _LOCK:
+            _CACHE[key] = (time.monotonic(), content)
+            _CACHE.move_to_end(key)
+            while len(_CACHE) > MAX_ENTRIES:
+                _CACHE.popitem(last=False)
+        future.set_result(content)
+        return content
+    finally:
+        with _LOCK:
+            _INFLIGHT.pop(key, None)
+
+
+def clear_cache() -> None:
+    """清空缓存（测试或切换模型配置时使用）"""
+    with _LOCK:
+        _CACHE.clear()
@@ -0,0 +1,48 @@
+"""
+Prompt 工具
+各生成工具共用的 Prompt 模板加载与变量拼装逻辑
+"""
+
+import os
+from functools import lru_cache
+from typing import Any
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from config import PROMPTS_PATH
+
+
+@lru_cache(maxsize=None)
+def read_prompt_file(filename: str) -> str:
+    """
+    读取 prompts 目录下的模板文件（每个文件只读取一次）
+
+    Args:
+        filename: 模板文件名，如 "scenario.txt"
+
+    Returns:
+        模板文本
+    """
+    with open(os.path.join(PROMPTS_PATH, filename), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@lru_cache(maxsize=None)
+def get_prompt(filename: str) -> ChatPromptTemplate:
+    """将模板文件解析为 ChatPromptTemplate（每个文件只解析一次）"""
+    return ChatPromptTemplate.from_template(read_prompt_file(filename))
+
+
+def format_safety_constraints(safety_constraints: Any) -> str:
+    """
+    将安全约束格式化为 Prompt 中的列表文本（活动与实验工具共用）
+
+    Args:
+        safety_constraints: 知识库片段中的安全约束（列表或字符串）
+
+    Returns:
+        格式化后的安全约束文本
+    """
+    if isinstance(safety_constraints, list):
+        return "\n".join(f"- {item}" for item in safety_constraints)
+    return str(safety_constraints)